@@ -6,55 +6,173 @@ FastAPI Application for logical argument validation and proof generation
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse, Response, StreamingResponse
+from jinja2 import FileSystemBytecodeCache
 from typing import List, Optional
+import asyncio
+import gzip
 import os
 from pathlib import Path
+
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+import functools
+import logging
+
 from logic_processor import LogicProcessor
-from models import ArgumentRequest, ValidationResult
+from models import ArgumentRequest, InternalArgument, ValidationResult
+
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Herramienta de Pruebas Lógicas",
     description="Aplicación para validación de argumentos y generación de pruebas deductivas",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
+
+logger.info("✅ FastAPI app initialized successfully")
+logger.info("🔧 PYTHONPATH: %s", os.environ.get("PYTHONPATH", "Not set"))
+logger.info("🔑 GEMINI_API_KEY configured: %s", bool(os.environ.get("GEMINI_API_KEY")))
+logger.info("🌐 PORT: %s", os.environ.get("PORT", "8080"))
+
+# Setup templates - compiled templates stay cached; no mtime checks per request.
+# DEV=1 re-enables auto_reload for template editing; the bytecode cache lets a
+# restarted process skip re-parsing templates entirely.
+_jinja_cache_dir = Path(".jinja_cache")
+_jinja_cache_dir.mkdir(exist_ok=True)
+templates = Jinja2Templates(
+    directory="templates",
+    auto_reload=bool(os.environ.get("DEV")),
+    cache_size=-1,
+    bytecode_cache=FileSystemBytecodeCache(str(_jinja_cache_dir)),
 )
 
-print("✅ FastAPI app initialized successfully")
-print(f"🔧 PYTHONPATH: {os.environ.get('PYTHONPATH', 'Not set')}")
-print(f"🔑 GEMINI_API_KEY configured: {'Yes' if os.environ.get('GEMINI_API_KEY') else 'No'}")
-print(f"🌐 PORT: {os.environ.get('PORT', '8080')}")
+# Template objects fetched once: rendering skips the per-request
+# env.get_template lookup (a lock-protected dict access) entirely
+_index_template = templates.get_template("index.html")
+
+# Pre-rendered default home page: a bare GET / serves cached bytes with zero
+# per-request template work (the templates never touch the request object).
+# A gzip variant is compressed once for clients that accept it.
+_default_home_html = _index_template.render(
+    request=None, num_premises=2, premises=["", ""], conclusion=""
+).encode()
+_default_home_html_gz = gzip.compress(_default_home_html, compresslevel=9)
+_HOME_CACHE_HEADERS = {"Cache-Control": "public, max-age=300", "Vary": "Accept-Encoding"}
+
+# Split results.html at its first dynamic tag: the static head (styles, scripts,
+# page chrome) is flushed to the browser before Gemini is even called, so CSS/JS
+# start downloading during generation; the dynamic tail renders once the
+# ValidationResult is available
+_results_src = templates.env.loader.get_source(templates.env, "results.html")[0]
+_results_split = _results_src.index("{%")
+_RESULTS_HEAD = _results_src[:_results_split].encode()
+_results_tail_template = templates.env.from_string(_results_src[_results_split:])
 
-# Setup templates
-templates = Jinja2Templates(directory="templates")
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with a long Cache-Control so browsers stop re-fetching assets.
+
+    In production a reverse proxy (nginx/Caddy with sendfile) should serve
+    /static directly; this keeps repeated fetches cheap when Python does.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
 # Setup static files (only if directory exists)
 static_dir = Path("static")
 if static_dir.exists() and static_dir.is_dir():
-    app.mount("/static", StaticFiles(directory="static"), name="static")
-    print("✅ Static files directory mounted")
+    app.mount("/static", CachedStaticFiles(directory="static", html=False), name="static")
+    logger.info("✅ Static files directory mounted")
 else:
-    print("⚠️ Static directory not found, skipping static files mounting")
+    logger.warning("⚠️ Static directory not found, skipping static files mounting")
+
+# Lazy singleton: the Gemini client is only created on the first validation
+# request, so startup stays fast and health checks work without an API key
+@functools.lru_cache(maxsize=1)
+def get_processor() -> LogicProcessor:
+    return LogicProcessor()
 
-# Initialize logic processor
-try:
-    logic_processor = LogicProcessor()
-    print("✅ Logic processor initialized successfully")
-except Exception as e:
-    print(f"⚠️ Warning: Could not initialize logic processor: {e}")
-    print("📝 The app will start but may not process arguments correctly")
-    logic_processor = None
+class DynamicBatcher:
+    """
+    Agrupa validaciones concurrentes en una sola llamada por lotes a Gemini
+
+    Requests that arrive within max_delay of each other share one batched
+    prompt (validate_arguments_batch) instead of issuing N round-trips.
+    """
+
+    def __init__(self, processor: LogicProcessor, max_batch_size: int = 8, max_delay: float = 0.05):
+        self._processor = processor
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._pending: list = []  # (ArgumentRequest, Future) pairs
+        self._flush_task = None
+
+    async def submit(self, argument: ArgumentRequest) -> ValidationResult:
+        """Queue an argument and wait for its result from the shared batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((argument, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._max_delay)
+        self._flush()
+
+    def _flush(self):
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        try:
+            if len(batch) == 1:
+                # A lone request takes the single-argument path (cache + fast paths)
+                results = [await self._processor.validate_argument(batch[0][0])]
+            else:
+                results = await self._processor.validate_arguments_batch([arg for arg, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+@functools.lru_cache(maxsize=1)
+def get_batcher() -> DynamicBatcher:
+    return DynamicBatcher(get_processor())
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request, num_premises: int = 2, conclusion: str = ""):
     """
     Página principal con formulario para introducir argumentos
     """
+    # Fast path: no state in the query string means the precomputed default page
+    if not request.query_params:
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return HTMLResponse(
+                _default_home_html_gz,
+                headers={**_HOME_CACHE_HEADERS, "Content-Encoding": "gzip"},
+            )
+        return HTMLResponse(_default_home_html, headers=_HOME_CACHE_HEADERS)
+
     # Ensure minimum of 2 premises always
     num_premises = max(num_premises, 2)
     
@@ -68,15 +186,12 @@ async def home(request: Request, num_premises: int = 2, conclusion: str = ""):
     while len(premises) < num_premises:
         premises.append("")
     
-    return templates.TemplateResponse(
-        "index.html", 
-        {
-            "request": request, 
-            "num_premises": num_premises,
-            "premises": premises,
-            "conclusion": conclusion
-        }
-    )
+    return HTMLResponse(_index_template.render(
+        request=request,
+        num_premises=num_premises,
+        premises=premises,
+        conclusion=conclusion
+    ))
 
 @app.post("/validate", response_class=HTMLResponse)
 async def validate_argument(
@@ -90,36 +205,27 @@ async def validate_argument(
     """
     conclusion = conclusion.strip() if conclusion else ""
     
-    # Handle add premise action
+    # Handle add premise action (no-JavaScript fallback; the client normally
+    # adds premises without this round-trip)
     if action == "add_premise":
-        # Keep ALL premises exactly as they are (including empty ones)
-        # Convert single spaces back to empty strings (from frontend handling)
-        premises_to_preserve = [p if p.strip() != '' else "" for p in premises] if premises else []
-        
         # Use RedirectResponse to avoid staying on /validate URL
         import urllib.parse
-        
+
         # Ensure we always have at least 2 premises, then add 1 more
-        new_premises_count = max(len(premises_to_preserve) + 1, 2)
-        
-        # Create URL parameters to preserve state  
-        params = {
-            'num_premises': new_premises_count,
-            'conclusion': conclusion
-        }
-        
-        # Create the full list of premises with the new empty one
-        all_premises = premises_to_preserve + [""]
-        
-        # Ensure we have at least 2 premises total
-        while len(all_premises) < new_premises_count:
-            all_premises.append("")
-            
-        # Add ALL premises as parameters
-        for i, premise in enumerate(all_premises):
-            params[f'premise_{i}'] = premise if premise else ""
-            
-        query_string = urllib.parse.urlencode(params)
+        new_premises_count = max(len(premises) + 1, 2) if premises else 2
+
+        # Single pass: preserve every premise (spaces from the frontend become
+        # empty strings), append the new empty one, pad to the minimum count
+        pairs = [("num_premises", new_premises_count), ("conclusion", conclusion)]
+        pairs.extend(
+            (f"premise_{i}", p.strip() and p or "")
+            for i, p in enumerate(premises or [])
+        )
+        pairs.extend(
+            (f"premise_{i}", "") for i in range(len(premises or []), new_premises_count)
+        )
+
+        query_string = urllib.parse.urlencode(pairs)
         return RedirectResponse(url=f"/?{query_string}", status_code=302)
     
     # Validate input only for validation action
@@ -146,16 +252,13 @@ async def validate_argument(
                 
             error_text = f"Por favor, introduce {' y '.join(error_message)}."
             
-            return templates.TemplateResponse(
-                "index.html",
-                {
-                    "request": request,
-                    "num_premises": len(original_premises) if original_premises else 2,
-                    "premises": original_premises if original_premises else ["", ""],
-                    "conclusion": conclusion,
-                    "error": error_text
-                }
-            )
+            return HTMLResponse(_index_template.render(
+                request=request,
+                num_premises=len(original_premises) if original_premises else 2,
+                premises=original_premises if original_premises else ["", ""],
+                conclusion=conclusion,
+                error=error_text
+            ))
         
         # Use filtered premises for processing
         premises = filtered_premises
@@ -163,57 +266,91 @@ async def validate_argument(
     # Only process if action is validate (this should only happen after validation passes)
     if action == "validate":
         try:
-            if logic_processor is None:
-                raise Exception("Logic processor not initialized - check GEMINI_API_KEY")
-            
-            # Process the argument
-            argument_request = ArgumentRequest(premises=premises, conclusion=conclusion)
-            result = await logic_processor.validate_argument(argument_request)
-            
-            return templates.TemplateResponse(
-                "results.html",
-                {
-                    "request": request,
-                    "premises": premises,
-                    "conclusion": conclusion,
-                    "result": result
-                }
-            )
-            
+            batcher = get_batcher()
+
+            # Process the argument; concurrent requests share one Gemini call.
+            # The form data was validated above, so the cheap frozen dataclass
+            # avoids a second round of Pydantic validation.
+            argument_request = InternalArgument(tuple(premises), conclusion)
         except Exception as e:
-            return templates.TemplateResponse(
-                "index.html",
-                {
-                    "request": request,
-                    "num_premises": len(premises),
-                    "premises": premises,
-                    "conclusion": conclusion,
-                    "error": f"Error al procesar el argumento: {str(e)}"
-                }
-            )
+            return HTMLResponse(_index_template.render(
+                request=request,
+                num_premises=len(premises),
+                premises=premises,
+                conclusion=conclusion,
+                error=f"Error al procesar el argumento: {str(e)}"
+            ))
+
+        async def generate_results():
+            # Static head first: time-to-first-byte is independent of Gemini
+            yield _RESULTS_HEAD
+            try:
+                result = await batcher.submit(argument_request)
+            except Exception as e:
+                yield (
+                    f'<div class="p-4 text-red-400">Error al procesar el argumento: {e}</div>'
+                    "</body></html>"
+                ).encode()
+                return
+            yield _results_tail_template.render(
+                premises=premises, conclusion=conclusion, result=result
+            ).encode()
+
+        return StreamingResponse(generate_results(), media_type="text/html")
     else:
         # If action is not validate, redirect to home
         return RedirectResponse(url="/", status_code=302)
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy", 
+@app.post("/api/validate")
+async def api_validate(argument: ArgumentRequest) -> ValidationResult:
+    """
+    Valida un argumento y devuelve el resultado en JSON, sin pasar por las plantillas
+    """
+    try:
+        batcher = get_batcher()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Logic processor not available: {e}")
+
+    return await batcher.submit(argument)
+
+# Probe endpoints are hit once a second by load balancers; serialize both
+# health variants and the startup body once instead of building dicts per hit
+_HEALTH_BODIES = {
+    initialized: orjson.dumps({
+        "status": "healthy",
         "message": "Logic Proofs Tool is running",
         "port": os.environ.get("PORT", "8080"),
-        "logic_processor": "initialized" if logic_processor else "not_initialized",
+        "logic_processor": "initialized" if initialized else "not_initialized",
         "gemini_configured": bool(os.environ.get("GEMINI_API_KEY"))
-    }
+    })
+    for initialized in (False, True)
+}
+_STARTUP_BODY = orjson.dumps({"status": "ok", "timestamp": "2025-09-25"})
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    body = _HEALTH_BODIES[bool(get_processor.cache_info().currsize)]
+    return Response(content=body, media_type="application/json")
 
 @app.get("/startup")
 async def startup_check():
     """Simple startup check - no dependencies"""
-    return {"status": "ok", "timestamp": "2025-09-25"}
+    return Response(content=_STARTUP_BODY, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8080))
-    print(f"Starting server on port {port}")
-    
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    logger.info("Starting server on port %d", port)
+
+    # "auto" selecciona uvloop + httptools cuando están instalados (Linux/macOS)
+    # y cae al loop y parser puros de Python donde no (p. ej. Windows);
+    # el string de import (en lugar del objeto app) permite forkar workers
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="auto",
+        http="auto",
+        workers=int(os.environ.get("WEB_CONCURRENCY", max(1, (os.cpu_count() or 1) // 2))),
+    )
\ No newline at end of file
@@ -2,8 +2,10 @@
 Data models for the logical proofs application
 """
 
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+import sys
+from dataclasses import dataclass
+from pydantic import BaseModel, field_validator
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
 
 class InferenceRule(str, Enum):
@@ -24,15 +26,32 @@ class InferenceRule(str, Enum):
     TAUTOLOGY = "Tautología"
     PREMISE = "Premisa"
 
+# Known rule names as a frozenset: membership is an O(1) hash probe with no
+# Enum construction per proof step
+_INFERENCE_RULE_VALUES = frozenset(rule.value for rule in InferenceRule)
+
 class ProofStep(BaseModel):
     """A single step in a logical proof"""
     step_number: int
     statement: str
     symbolic_form: str
     justification: str
-    rule_applied: Optional[InferenceRule] = None
+    rule_applied: Optional[str] = None  # One of the InferenceRule values
     references: List[int] = []  # References to previous steps
 
+    @field_validator("rule_applied", mode="before")
+    @classmethod
+    def _check_rule(cls, value):
+        """Accept enum members or known rule names; intern the resulting string"""
+        if value is None:
+            return value
+        if isinstance(value, InferenceRule):
+            return value.value
+        value = sys.intern(str(value))
+        if value not in _INFERENCE_RULE_VALUES:
+            raise ValueError(f"Regla de inferencia desconocida: {value}")
+        return value
+
 class Counterexample(BaseModel):
     """A counterexample for invalid arguments"""
     variable_assignments: Dict[str, bool]
@@ -53,4 +72,10 @@ class ValidationResult(BaseModel):
 class ArgumentRequest(BaseModel):
     """Request model for argument validation"""
     premises: List[str]
+    conclusion: str
+
+@dataclass(frozen=True, slots=True)
+class InternalArgument:
+    """Already-validated argument for internal hand-off, skipping Pydantic costs"""
+    premises: Tuple[str, ...]
     conclusion: str
\ No newline at end of file
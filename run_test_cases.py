@@ -6,7 +6,7 @@ Permite probar casos individuales contra la aplicación real
 import asyncio
 import sys
 import os
-import json
+import orjson
 from typing import Dict, Any, List
 from dotenv import load_dotenv
 
@@ -26,6 +26,8 @@ class TestRunner:
     def __init__(self):
         self.processor = None
         self.results = []
+        # Límite de casos en vuelo; el ritmo hacia Gemini lo regula el procesador
+        self.semaphore = asyncio.Semaphore(4)
         
     async def initialize(self):
         """Inicializar el procesador lógico"""
@@ -113,22 +115,35 @@ class TestRunner:
             self.results.append(error_result)
             return error_result
     
+    async def _run_with_limit(self, index: int, total: int, case: TestCase) -> Dict[str, Any]:
+        """Ejecutar un caso respetando el límite de concurrencia"""
+        async with self.semaphore:
+            print(f"\n[{index}/{total}] " + "=" * 40)
+            return await self.run_single_case(case)
+
     async def run_multiple_cases(self, cases: List[TestCase], stop_on_error: bool = False):
-        """Ejecutar múltiples casos de prueba"""
+        """Ejecutar múltiples casos de prueba
+
+        Los casos corren en paralelo (hasta 4 en vuelo); el rate limiting hacia
+        Gemini ya lo aplica LogicProcessor, así que no hace falta pausar entre
+        casos. Con stop_on_error la ejecución vuelve a ser secuencial para poder
+        detenerse en el primer fallo.
+        """
         print(f"\n🚀 Ejecutando {len(cases)} casos de prueba...")
         print("=" * 60)
-        
-        for i, case in enumerate(cases, 1):
-            print(f"\n[{i}/{len(cases)}] " + "=" * 40)
-            
-            result = await self.run_single_case(case)
-            
-            if stop_on_error and result.get("error"):
-                print("\n⚠️ Deteniendo ejecución por error")
-                break
-            
-            # Pausa breve para evitar rate limiting
-            await asyncio.sleep(1)
+
+        if stop_on_error:
+            for i, case in enumerate(cases, 1):
+                print(f"\n[{i}/{len(cases)}] " + "=" * 40)
+                result = await self.run_single_case(case)
+                if result.get("error"):
+                    print("\n⚠️ Deteniendo ejecución por error")
+                    break
+            return
+
+        await asyncio.gather(
+            *[self._run_with_limit(i, len(cases), case) for i, case in enumerate(cases, 1)]
+        )
     
     def print_summary(self):
         """Imprimir resumen de resultados"""
@@ -174,8 +189,11 @@ class TestRunner:
     def save_results(self, filename: str = "test_results.json"):
         """Guardar resultados en archivo JSON"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.results, f, indent=2, ensure_ascii=False)
+            # orjson serializa en un solo buffer binario; un único write + fsync
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+                f.flush()
+                os.fsync(f.fileno())
             print(f"\n💾 Resultados guardados en: {filename}")
         except Exception as e:
             print(f"\n❌ Error guardando resultados: {e}")
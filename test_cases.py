@@ -3,10 +3,14 @@ Casos de Prueba Completos para la Herramienta de Pruebas Lógicas
 Incluye argumentos válidos e inválidos con sus justificaciones esperadas
 """
 
-from typing import Dict, List, Any
-from dataclasses import dataclass
-
-@dataclass
+import sys
+from collections import Counter, defaultdict
+from functools import lru_cache
+from operator import attrgetter
+from typing import Dict, List, Any, Tuple
+from dataclasses import dataclass, field
+
+@dataclass(slots=True, frozen=True)
 class TestCase:
     """Estructura para definir un caso de prueba"""
     name: str
@@ -19,12 +23,18 @@ class TestCase:
     inference_rule: str = None  # Para casos válidos
     fallacy_type: str = None    # Para casos inválidos
     description: str = ""
+    # Derivado de category al construir: una comparación por caso en lugar
+    # de una por cada exportación o aserción
+    expected_valid: bool = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "expected_valid", self.category == "valid")
 
 # ===============================
 # CASOS DE PRUEBA VÁLIDOS ✅
 # ===============================
 
-VALID_TEST_CASES = [
+VALID_TEST_CASES = (
     TestCase(
         name="Caso 1: Modus Ponens Clásico",
         category="valid",
@@ -208,13 +218,13 @@ VALID_TEST_CASES = [
         inference_rule="Resolución",
         description="Eliminación de variables complementarias"
     )
-]
+)
 
 # ===============================
 # CASOS DE PRUEBA INVÁLIDOS ❌
 # ===============================
 
-INVALID_TEST_CASES = [
+INVALID_TEST_CASES = (
     TestCase(
         name="Caso 13: Falacia de Afirmación del Consecuente",
         category="invalid",
@@ -394,74 +404,102 @@ INVALID_TEST_CASES = [
         fallacy_type="Apelación a la Autoridad Inapropiada",
         description="Apelar a autoridad fuera de su área de expertise"
     )
-]
+)
 
 # ===============================
 # FUNCIONES AUXILIARES
 # ===============================
 
-def get_all_test_cases() -> List[TestCase]:
+# Construidos una sola vez al importar: la colección completa no se
+# reconcatena por llamada (y al ser tupla nadie puede mutarla por accidente);
+# las búsquedas por nombre son un acceso O(1) al diccionario
+_ALL_CASES = VALID_TEST_CASES + INVALID_TEST_CASES
+_CASES_BY_NAME = {case.name: case for case in _ALL_CASES}
+
+# Índice de casos válidos por regla de inferencia, agrupado al importar
+_CASES_BY_RULE = defaultdict(list)
+for _case in VALID_TEST_CASES:
+    _CASES_BY_RULE[_case.inference_rule].append(_case)
+del _case
+
+def get_cases_by_rule(rule: str) -> List[TestCase]:
+    """Casos válidos cuya regla contiene el nombre dado (cubre reglas compuestas)"""
+    return [case for key, cases in _CASES_BY_RULE.items() if rule in key for case in cases]
+
+# La colección es fija, así que la distribución de premisas también lo es
+_PREMISE_DISTRIBUTION = Counter(len(case.premises) for case in _ALL_CASES)
+
+def premise_distribution() -> Counter:
+    """Distribución de casos por número de premisas, calculada al importar"""
+    return _PREMISE_DISTRIBUTION
+
+def get_all_test_cases() -> Tuple[TestCase, ...]:
     """Retorna todos los casos de prueba"""
-    return VALID_TEST_CASES + INVALID_TEST_CASES
+    return _ALL_CASES
 
-def get_valid_cases() -> List[TestCase]:
+def get_valid_cases() -> Tuple[TestCase, ...]:
     """Retorna solo los casos válidos"""
     return VALID_TEST_CASES
 
-def get_invalid_cases() -> List[TestCase]:
+def get_invalid_cases() -> Tuple[TestCase, ...]:
     """Retorna solo los casos inválidos"""
     return INVALID_TEST_CASES
 
 def get_case_by_name(name: str) -> TestCase:
     """Busca un caso por nombre"""
-    all_cases = get_all_test_cases()
-    for case in all_cases:
-        if case.name == name:
-            return case
-    raise ValueError(f"Caso de prueba '{name}' no encontrado")
+    try:
+        return _CASES_BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"Caso de prueba '{name}' no encontrado") from None
 
 def print_test_case_summary():
     """Imprime un resumen de todos los casos de prueba"""
     valid_cases = get_valid_cases()
     invalid_cases = get_invalid_cases()
-    
-    print("=" * 60)
-    print("RESUMEN DE CASOS DE PRUEBA - HERRAMIENTA DE PRUEBAS LÓGICAS")
-    print("=" * 60)
-    print(f"Total de casos: {len(get_all_test_cases())}")
-    print(f"Casos válidos: {len(valid_cases)}")
-    print(f"Casos inválidos: {len(invalid_cases)}")
-    print()
-    
-    print("CASOS VÁLIDOS ✅:")
-    print("-" * 40)
-    for i, case in enumerate(valid_cases, 1):
-        print(f"{i:2d}. {case.name}")
-        print(f"    Regla: {case.inference_rule}")
-        print(f"    Premisas: {len(case.premises)}")
-        print()
-    
-    print("CASOS INVÁLIDOS ❌:")
-    print("-" * 40)
-    for i, case in enumerate(invalid_cases, 1):
-        print(f"{i:2d}. {case.name}")
-        print(f"    Falacia: {case.fallacy_type}")
-        print(f"    Premisas: {len(case.premises)}")
-        print()
-
-def export_cases_for_testing() -> List[Dict[str, Any]]:
+
+    # Cada bloque se arma con un join en C sobre un generador (una entrada
+    # multilínea por caso) y todo se escribe con una sola llamada
+    valid_block = "\n".join(
+        f"{i:2d}. {case.name}\n    Regla: {case.inference_rule}\n    Premisas: {len(case.premises)}\n"
+        for i, case in enumerate(valid_cases, 1)
+    )
+    invalid_block = "\n".join(
+        f"{i:2d}. {case.name}\n    Falacia: {case.fallacy_type}\n    Premisas: {len(case.premises)}\n"
+        for i, case in enumerate(invalid_cases, 1)
+    )
+
+    parts = (
+        "=" * 60,
+        "RESUMEN DE CASOS DE PRUEBA - HERRAMIENTA DE PRUEBAS LÓGICAS",
+        "=" * 60,
+        f"Total de casos: {len(get_all_test_cases())}",
+        f"Casos válidos: {len(valid_cases)}",
+        f"Casos inválidos: {len(invalid_cases)}",
+        "",
+        "CASOS VÁLIDOS ✅:",
+        "-" * 40,
+        valid_block,
+        "CASOS INVÁLIDOS ❌:",
+        "-" * 40,
+        invalid_block,
+    )
+
+    sys.stdout.write("\n".join(parts) + "\n")
+
+# attrgetter resuelve los cinco campos de cada caso en una sola llamada en C
+_EXPORT_FIELDS = ("name", "category", "premises", "conclusion", "description")
+_export_fields = attrgetter(*_EXPORT_FIELDS)
+
+@lru_cache(maxsize=1)
+def export_cases_for_testing() -> Tuple[Dict[str, Any], ...]:
     """Exporta los casos en formato dict para testing automatizado"""
-    cases = []
-    for test_case in get_all_test_cases():
-        cases.append({
-            "name": test_case.name,
-            "category": test_case.category,
-            "premises": test_case.premises,
-            "conclusion": test_case.conclusion,
-            "expected_valid": test_case.category == "valid",
-            "description": test_case.description
-        })
-    return cases
+    return tuple(
+        dict(
+            zip(_EXPORT_FIELDS, _export_fields(test_case)),
+            expected_valid=test_case.expected_valid
+        )
+        for test_case in _ALL_CASES
+    )
 
 if __name__ == "__main__":
     # Mostrar resumen cuando se ejecuta el script directamente